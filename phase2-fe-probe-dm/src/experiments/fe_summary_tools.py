@@ -13,8 +13,10 @@ def summarize_csv(fe_csv, tag=None):
     return dict(file=fe_csv, n=len(df), abs_mean=abs_mean, abs_dev=abs_dev, arg_std=arg_std, tag=tag or "")
 
 def batch_summarize(pattern, out_csv):
+    # pattern: glob string, or an explicit list of CSV paths
+    files = sorted(glob.glob(pattern)) if isinstance(pattern, str) else list(pattern)
     rows = []
-    for fn in sorted(glob.glob(pattern)):
+    for fn in files:
         rows.append(summarize_csv(fn))
     out = pd.DataFrame(rows)
     out.to_csv(out_csv, index=False)
@@ -183,3 +183,6 @@ def main():
         fig.tight_layout()
         fig.savefig(args.out_png, dpi=180, bbox_inches="tight")
         print("Saved", args.out_png, args.out_csv)
+
+if __name__ == "__main__":
+    main()
@@ -11,18 +11,18 @@
 #
 # Optional: --robust to use Huber regression (requires statsmodels).
 
-import argparse, glob, re
+import argparse, glob, os, re
 import numpy as np, pandas as pd
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D  # noqa: F401
 
-def load_grid(pattern: str):
+def load_grid(pattern: str, files=None):
     rows=[]
-    files = sorted(glob.glob(pattern))
+    files = sorted(files) if files else sorted(glob.glob(pattern))
     if not files:
         raise FileNotFoundError(f"No files match pattern: {pattern}")
     for fn in files:
-        m=re.search(r"a([0-9.]+)_m([0-9.]+)",fn)
+        m=re.search(r"a(-?\d+(?:\.\d+)?)_m(-?\d+(?:\.\d+)?)",os.path.basename(fn))
         if not m: 
             continue
         a=float(m.group(1)); mu=float(m.group(2))
@@ -92,13 +92,14 @@ def plot_contour(df, k1, k2, c, out_path):
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--pattern", type=str, default="docs/figures/zeros_a*_m*.csv")
+    ap.add_argument("--files", nargs="+", help="explicit zero CSVs (overrides --pattern)")
     ap.add_argument("--surface", type=str, default="docs/figures/f_surface.png")
     ap.add_argument("--contour", type=str, default="docs/figures/f_contour.png")
     ap.add_argument("--summary", type=str, default="docs/figures/f_summary.csv")
     ap.add_argument("--robust", action="store_true")
     args = ap.parse_args()
 
-    df = load_grid(args.pattern)
+    df = load_grid(args.pattern, files=args.files)
     k1, k2, c, rmse = fit_plane(df, robust=args.robust)
 
     # Save summary CSV
@@ -22,7 +22,6 @@ def ks_distance_to_gue(zeros_csv):
     ecdf_y = np.arange(1, len(s)+1)/len(s)
 
     # Theoretical CDF via numeric integration of pdf
-    from numpy import trapz
     grid = np.linspace(0, max(4, s.max()*1.25), 2000)
     pdf = wigner_gue_pdf(grid)
     cdf = np.cumsum(pdf) * (grid[1]-grid[0])
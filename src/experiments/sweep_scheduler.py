@@ -0,0 +1,484 @@
+# src/experiments/sweep_scheduler.py
+# Expand a declarative (α, μ) sweep spec into jobs on a file-locked local queue,
+# run them from any number of worker processes, and aggregate the results.
+#
+# Spec (JSON):
+#   {
+#     "outdir": "runs/sweep",
+#     "alpha": {"start": 0.0, "stop": 0.04, "num": 3},     # or a list [0.0, 0.02]
+#     "mu": [0.0, 0.01],
+#     "k0": 0.0,
+#     "tasks": ["heatmap", "trace", "ks", "fe"],
+#     "retries": 2,
+#     "heatmap": {"Nsum": 20000, "Ns": 120, "Nt": 400},    # extra CLI flags per task
+#     "trace": {"tstart": 10, "tstop": 60, "dt": 0.25},
+#     "fe": {"kernel": "zeta_a", "tmin": 10, "tmax": 60, "Nt": 200,
+#            "configs": [["classic", "critical", 0.5], ["pi_eff", "critical", 0.5]]}
+#   }
+#
+# Usage (from repo root):
+#   python src/experiments/sweep_scheduler.py run --spec sweep.json --workers 4
+#   python src/experiments/sweep_scheduler.py worker --outdir runs/sweep     # extra workers
+#   python src/experiments/sweep_scheduler.py status --outdir runs/sweep
+#
+# Each job carries a fingerprint of its parameters (α, μ, k0, task options, and those of
+# its dependencies), stamped next to its outputs when it completes. A job is skipped only
+# when its required outputs exist and the stamp matches, so changing the spec re-runs the
+# affected jobs. Failed jobs are re-queued up to "retries" times. Running workers heartbeat
+# their job; a job whose heartbeat is older than the lease stored in the queue, or whose
+# worker process on this host is gone, is re-queued. Re-running `plan`/`run` keeps finished
+# jobs, resets failed/orphaned ones, and drops jobs that are no longer in the spec.
+# The queue lock uses fcntl, so workers must share a POSIX filesystem.
+
+import argparse, fcntl, hashlib, json, os, socket, subprocess, sys, threading, time, traceback
+import importlib.util
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+LEASE = 600.0
+TASKS = ("heatmap", "trace", "ks", "fe")
+FE_CONFIGS = [
+    ("classic", "critical", 0.5),
+    ("classic", "offset_plus", 0.5),
+    ("classic", "offset_minus", 0.5),
+    ("pi_eff", "critical", 0.5),
+]
+
+def find_script(name):
+    # The FE pack may live in its own directory or be dropped into src/experiments.
+    for base in (ROOT / "src" / "experiments", ROOT / "phase2-fe-probe-dm" / "src" / "experiments"):
+        if (base / name).exists():
+            return base / name
+    raise FileNotFoundError(f"Cannot locate {name}")
+
+def fmt(x):
+    # Positional notation (no exponent) keeps tags matching adaptive_manifold_fit's a<α>_m<μ> pattern.
+    return np.format_float_positional(float(x), trim="-")
+
+def expand_values(v):
+    if isinstance(v, dict):
+        return [float(x) for x in np.linspace(v["start"], v["stop"], int(v["num"]))]
+    if isinstance(v, (list, tuple)):
+        return [float(x) for x in v]
+    return [float(v)]
+
+def cli_flags(opts):
+    flags = []
+    for k, v in opts.items():
+        flags += [f"--{k}", str(v)]
+    return flags
+
+def expand_spec(spec):
+    """Expand a sweep spec into a list of job dicts (one per parameter point × task)."""
+    outdir = Path(spec.get("outdir", "runs/sweep"))
+    tasks = spec.get("tasks", ["trace"])
+    unknown = set(tasks) - set(TASKS)
+    if unknown:
+        raise ValueError(f"Unknown tasks: {sorted(unknown)}")
+    k0 = float(spec.get("k0", 0.0))
+    jobs = []
+    for alpha in expand_values(spec.get("alpha", 0.0)):
+        for mu in expand_values(spec.get("mu", 0.0)):
+            tag = f"a{fmt(alpha)}_m{fmt(mu)}"
+            base = dict(alpha=alpha, mu=mu, k0=k0, deps=[])
+            trace_csv = str(outdir / "traces" / f"zeros_{tag}.csv")
+            if "heatmap" in tasks:
+                jobs.append(dict(base, id=f"heatmap_{tag}", task="heatmap",
+                                 outputs=[str(outdir / "heatmaps" / f"heat_{tag}.png")],
+                                 opts=spec.get("heatmap", {})))
+            if "trace" in tasks or "ks" in tasks:
+                jobs.append(dict(base, id=f"trace_{tag}", task="trace", outputs=[trace_csv], required=[trace_csv],
+                                 opts=spec.get("trace", {})))
+            if "ks" in tasks:
+                jobs.append(dict(base, id=f"ks_{tag}", task="ks", deps=[f"trace_{tag}"],
+                                 outputs=[str(outdir / "ks" / f"ks_{tag}.csv"),
+                                          str(outdir / "ks" / f"ks_{tag}.png")],
+                                 opts={}))
+            if "fe" in tasks:
+                fe = dict(spec.get("fe", {}))
+                kernel = fe.pop("kernel", "zeta_a")
+                configs = fe.pop("configs", FE_CONFIGS)
+                for gamma, line, sigma in configs:
+                    stem = f"fe_{tag}_{kernel}_{gamma}_{line}_s{fmt(sigma)}"
+                    fe_csv = str(outdir / "fe" / f"{stem}.csv")
+                    # The FE probe writes no PNG when every point is skipped near a zero.
+                    jobs.append(dict(base, id=stem, task="fe", required=[fe_csv],
+                                     outputs=[fe_csv, str(outdir / "fe" / f"{stem}.png")],
+                                     opts=dict(fe, kernel=kernel, gamma=gamma, line=line, sigma=sigma)))
+    dupes = sorted(i for i, n in Counter(j["id"] for j in jobs).items() if n > 1)
+    if dupes:
+        raise ValueError(f"Spec expands to duplicate jobs: {dupes}")
+    by_id = {}
+    for job in jobs:
+        job.setdefault("required", job["outputs"])
+        params = {k: job[k] for k in ("task", "alpha", "mu", "k0", "opts")}
+        deps = [by_id[d]["fingerprint"] for d in job["deps"]]
+        job["fingerprint"] = hashlib.sha1(json.dumps([params, deps], sort_keys=True).encode()).hexdigest()
+        by_id[job["id"]] = job
+    return jobs
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class JobQueue:
+    """JSON job table guarded by an exclusive fcntl lock on a sidecar file."""
+
+    def __init__(self, outdir):
+        self.outdir = Path(outdir)
+        self.path = self.outdir / "queue.json"
+        self.lock_path = self.outdir / "queue.lock"
+
+    @contextmanager
+    def locked(self):
+        self.outdir.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                state = self._load()
+                yield state
+                self._save(state)
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def read(self):
+        """Snapshot of the queue under a shared lock; never writes."""
+        if not self.path.exists():
+            raise FileNotFoundError(f"No queue at {self.path}")
+        with open(self.lock_path, "a") as lf:
+            fcntl.flock(lf, fcntl.LOCK_SH)
+            try:
+                return self._load()
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _load(self):
+        if not self.path.exists():
+            return {"retries": 0, "lease": LEASE, "jobs": {}}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _save(self, state):
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def _reap(self, state, now):
+        # Re-queue running jobs whose worker died on this host or stopped heartbeating.
+        host, lease = socket.gethostname(), state.get("lease", LEASE)
+        for rec in state["jobs"].values():
+            if rec["status"] != "running":
+                continue
+            owner, _, pid = (rec["worker"] or "").rpartition(":")
+            if owner == host and pid.isdigit() and not pid_alive(int(pid)):
+                retire(state, rec, f"worker {rec['worker']} exited")
+            elif now - (rec.get("heartbeat") or rec["started"] or 0) > lease:
+                retire(state, rec, f"lease expired on {rec['worker']}")
+
+    def enqueue(self, jobs, retries=0, lease=LEASE):
+        """Replace the queue's job set with `jobs`, keeping finished ones whose stamped outputs
+        are intact and running ones with unchanged parameters. Returns the state counts."""
+        with self.locked() as state:
+            state["retries"], state["lease"] = int(retries), float(lease)
+            self._reap(state, time.time())
+            old_jobs, state["jobs"] = state["jobs"], {}
+            for job in jobs:
+                old = old_jobs.get(job["id"])
+                if old is not None and old["status"] == "running":
+                    if old.get("fingerprint") != job["fingerprint"]:
+                        raise RuntimeError(f"{job['id']} is running on {old['worker']} with different "
+                                           "parameters; stop that worker before re-planning")
+                    state["jobs"][job["id"]] = old
+                    continue
+                rec = dict(job, status="pending", attempts=0, error=None, worker=None, started=None)
+                if is_complete(rec):
+                    rec.update(status="done", note="outputs present")
+                state["jobs"][job["id"]] = rec
+            c = counts(state)
+            dropped = len(old_jobs.keys() - state["jobs"].keys())
+            if dropped:
+                c["dropped"] = dropped
+            return c
+
+    def claim(self, worker):
+        """Claim one runnable job. Returns (job, finished) where finished means nothing is left."""
+        now = time.time()
+        with self.locked() as state:
+            jobs = state["jobs"]
+            self._reap(state, now)
+            for rec in jobs.values():
+                if rec["status"] != "pending":
+                    continue
+                dep_status = [jobs[d]["status"] if d in jobs else "done" for d in rec["deps"]]
+                if any(s in ("failed", "blocked") for s in dep_status):
+                    rec.update(status="blocked", error="dependency failed")
+                    continue
+                if any(s != "done" for s in dep_status):
+                    continue
+                if is_complete(rec):
+                    rec.update(status="done", note="outputs present")
+                    continue
+                rec.update(status="running", worker=worker, started=now, heartbeat=now,
+                           attempts=rec["attempts"] + 1)
+                return dict(rec), False
+            active = any(r["status"] in ("pending", "running") for r in jobs.values())
+            return None, not active
+
+    def heartbeat(self, job_id, worker):
+        with self.locked() as state:
+            rec = state["jobs"].get(job_id)
+            if rec is None or rec["status"] != "running" or rec["worker"] != worker:
+                return False
+            rec["heartbeat"] = time.time()
+            return True
+
+    def finish(self, job_id, worker, error=None, requeue=False):
+        """Record a job's outcome. Ignored (returns False) if `worker` no longer owns the job.
+        With requeue=True the job goes back to pending without spending an attempt."""
+        with self.locked() as state:
+            rec = state["jobs"].get(job_id)
+            if rec is None or rec["status"] != "running" or rec["worker"] != worker:
+                return False
+            if error is None:
+                rec.update(status="done", error=None, worker=None)
+            elif requeue:
+                rec.update(status="pending", error=error, worker=None, attempts=rec["attempts"] - 1)
+            else:
+                retire(state, rec, error)
+            return True
+
+def retire(state, rec, error):
+    status = "pending" if rec["attempts"] <= state["retries"] else "failed"
+    rec.update(status=status, error=error, worker=None)
+
+def stamp_path(job):
+    return job["required"][0] + ".params.json"
+
+def write_stamp(job):
+    with open(stamp_path(job), "w") as f:
+        json.dump({k: job[k] for k in ("id", "fingerprint", "task", "alpha", "mu", "k0", "opts")}, f, indent=1)
+
+def is_complete(job):
+    """Required outputs exist and were produced with this job's parameters."""
+    if not all(os.path.exists(p) and os.path.getsize(p) > 0 for p in job["required"]):
+        return False
+    try:
+        with open(stamp_path(job)) as f:
+            return json.load(f)["fingerprint"] == job["fingerprint"]
+    except (OSError, ValueError, KeyError):
+        return False
+
+def counts(state):
+    c = {}
+    for rec in state["jobs"].values():
+        c[rec["status"]] = c.get(rec["status"], 0) + 1
+    return c
+
+def job_command(job):
+    common = ["--alpha", str(job["alpha"]), "--mu", str(job["mu"]), "--k0", str(job["k0"])]
+    if job["task"] == "heatmap":
+        return [sys.executable, str(find_script("zeta_plane_scan.py")), *common,
+                "--out", job["outputs"][0], *cli_flags(job["opts"])]
+    if job["task"] == "trace":
+        return [sys.executable, str(find_script("zeta_plane_scan.py")), *common,
+                "--trace", job["outputs"][0], *cli_flags(job["opts"])]
+    if job["task"] == "fe":
+        return [sys.executable, str(find_script("functional_equation_probe.py")), *common,
+                "--out_csv", job["outputs"][0], "--out_png", job["outputs"][1], *cli_flags(job["opts"])]
+    raise ValueError("No command for task: " + job["task"])
+
+def run_job(job, deps_outputs):
+    for p in job["outputs"]:
+        Path(p).parent.mkdir(parents=True, exist_ok=True)
+    # Drop a stale stamp first so an interrupted rerun never looks complete.
+    if os.path.exists(stamp_path(job)):
+        os.remove(stamp_path(job))
+    if job["task"] == "ks":
+        from src.experiments.ks_gue_tools import ks_plot
+        ks, _ = ks_plot(deps_outputs[0], job["outputs"][1])
+        with open(job["outputs"][0], "w") as f:
+            f.write("alpha,mu,ks\n")
+            f.write(f"{job['alpha']},{job['mu']},{ks}\n")
+        write_stamp(job)
+        return
+    # zeta_plane_scan imports pi_a_core.*, the FE probe imports src.pi_a_core.*
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), str(ROOT / "src"), env.get("PYTHONPATH")]))
+    env.setdefault("MPLBACKEND", "Agg")
+    cmd = job_command(job)
+    print(">>", " ".join(cmd))
+    subprocess.run(cmd, check=True, cwd=ROOT, env=env)
+    missing = [p for p in job["required"] if not os.path.exists(p)]
+    if missing:
+        raise RuntimeError(f"Job finished but outputs are missing: {missing}")
+    write_stamp(job)
+
+def heartbeat_loop(q, job_id, worker, stop, every):
+    while not stop.wait(every):
+        if not q.heartbeat(job_id, worker):
+            return
+
+def worker_loop(outdir, poll=2.0):
+    q = JobQueue(outdir)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        job, finished = q.claim(worker)
+        if finished:
+            return
+        if job is None:
+            time.sleep(poll)  # dependencies still running elsewhere
+            continue
+        state = q.read()
+        deps_outputs = [p for d in job["deps"] for p in state["jobs"][d]["outputs"]]
+        stop = threading.Event()
+        beat = threading.Thread(target=heartbeat_loop, args=(q, job["id"], worker, stop,
+                                                          state.get("lease", LEASE) / 4),
+                                daemon=True)
+        beat.start()
+        try:
+            run_job(job, deps_outputs)
+            if q.finish(job["id"], worker):
+                print(f"[{worker}] done {job['id']}")
+            else:
+                print(f"[{worker}] lost ownership of {job['id']}; result not recorded")
+        except Exception as e:
+            err = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+            q.finish(job["id"], worker, error=err)
+            print(f"[{worker}] failed {job['id']} (attempt {job['attempts']}): {err}")
+        except BaseException:
+            # Ctrl-C / SystemExit: hand the job back instead of leaving it "running".
+            q.finish(job["id"], worker, error="interrupted", requeue=True)
+            raise
+        finally:
+            stop.set()
+
+def load_fe_summary_tools():
+    path = find_script("fe_summary_tools.py")
+    spec = importlib.util.spec_from_file_location("fe_summary_tools", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def done_outputs(state, task):
+    return [r["required"][0] for r in state["jobs"].values() if r["task"] == task and r["status"] == "done"]
+
+def fit_manifold(outdir, state):
+    points = np.array(sorted({(r["alpha"], r["mu"]) for r in state["jobs"].values()
+                              if r["task"] == "trace" and r["status"] == "done"}))
+    # The surface plot triangulates the grid, which needs 3+ points not all on one line.
+    if len(points) < 3 or np.linalg.matrix_rank(points - points.mean(axis=0)) < 2:
+        print(f"Skipping manifold fit: need at least 3 non-collinear (α, μ) points, have {len(points)}")
+        return
+    cmd = [sys.executable, str(find_script("adaptive_manifold_fit.py")),
+           "--files", *done_outputs(state, "trace"),
+           "--surface", str(outdir / "f_surface.png"),
+           "--contour", str(outdir / "f_contour.png"),
+           "--summary", str(outdir / "f_summary.csv")]
+    print(">>", " ".join(cmd))
+    subprocess.run(cmd, check=True, cwd=ROOT, env=dict(os.environ, MPLBACKEND="Agg"))
+
+def summarize_fe(outdir, state):
+    summary_csv = outdir / "fe_summary.csv"
+    load_fe_summary_tools().batch_summarize(sorted(done_outputs(state, "fe")), str(summary_csv))
+    print("FE summary ->", summary_csv)
+
+def summarize_ks(outdir, state):
+    import pandas as pd
+    files = sorted(done_outputs(state, "ks"))
+    pd.concat([pd.read_csv(f) for f in files]).to_csv(outdir / "ks_summary.csv", index=False)
+    print("KS summary ->", outdir / "ks_summary.csv")
+
+def aggregate(outdir):
+    """Run adaptive_manifold_fit over zero traces, batch_summarize over FE CSVs, and collect KS values.
+    Each step runs independently; returns the names of the steps that failed."""
+    outdir = Path(outdir)
+    state = JobQueue(outdir).read()
+    done = {r["task"] for r in state["jobs"].values() if r["status"] == "done"}
+    failed = []
+    for task, step in (("trace", fit_manifold), ("fe", summarize_fe), ("ks", summarize_ks)):
+        if task not in done:
+            continue
+        try:
+            step(outdir, state)
+        except Exception as e:
+            print(f"Aggregation step {step.__name__} failed: {type(e).__name__}: {e}")
+            failed.append(step.__name__)
+    return failed
+
+def print_status(outdir):
+    state = JobQueue(outdir).read()
+    print("Jobs:", ", ".join(f"{k}={v}" for k, v in sorted(counts(state).items())))
+    for rec in state["jobs"].values():
+        if rec["status"] in ("failed", "blocked"):
+            print(f"  {rec['status']:8s} {rec['id']}: {rec['error']}")
+    return state
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("plan", "run"):
+        p = sub.add_parser(name)
+        p.add_argument("--spec", type=str, required=True)
+        p.add_argument("--outdir", type=str, help="override spec outdir")
+    sub.choices["run"].add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    sub.choices["run"].add_argument("--no-aggregate", action="store_true")
+    for name in ("worker", "status", "aggregate"):
+        p = sub.add_parser(name)
+        p.add_argument("--outdir", type=str, required=True)
+    for name in ("plan", "run"):
+        sub.choices[name].add_argument("--lease", type=float, default=LEASE,
+                                       help="seconds without a heartbeat before a running job is re-queued")
+    args = ap.parse_args()
+
+    if args.cmd in ("plan", "run"):
+        with open(args.spec) as f:
+            spec = json.load(f)
+        if args.outdir:
+            spec["outdir"] = args.outdir
+        # Workers run from the repo root, so pin job paths to absolute ones.
+        outdir = spec["outdir"] = str(Path(spec.get("outdir", "runs/sweep")).resolve())
+        jobs = expand_spec(spec)
+        c = JobQueue(outdir).enqueue(jobs, retries=spec.get("retries", 0), lease=args.lease)
+        print(f"Queued {len(jobs)} jobs in {outdir}:", c)
+        if args.cmd == "plan":
+            return
+        procs = [subprocess.Popen([sys.executable, __file__, "worker", "--outdir", outdir], cwd=ROOT)
+                 for _ in range(max(1, args.workers))]
+        try:
+            for p in procs:
+                p.wait()
+        except KeyboardInterrupt:
+            # Workers got the same SIGINT; let them hand their jobs back before exiting.
+            for p in procs:
+                p.wait()
+            raise
+        state = print_status(outdir)
+        failed = [] if args.no_aggregate else aggregate(outdir)
+        if failed or any(r["status"] in ("failed", "blocked") for r in state["jobs"].values()):
+            sys.exit(1)
+    elif args.cmd == "worker":
+        worker_loop(args.outdir)
+    elif args.cmd == "status":
+        try:
+            print_status(args.outdir)
+        except FileNotFoundError as e:
+            sys.exit(str(e))
+    elif args.cmd == "aggregate":
+        if aggregate(args.outdir):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    main()
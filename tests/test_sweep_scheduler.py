@@ -0,0 +1,204 @@
+# tests/test_sweep_scheduler.py
+import os, socket, subprocess, sys
+import pandas as pd
+import pytest
+from src.experiments import sweep_scheduler as ss
+from src.experiments.sweep_scheduler import (JobQueue, aggregate, expand_spec, is_complete,
+                                             job_command, run_job)
+
+def make_spec(tmp_path, tasks, alpha=None, mu=None):
+    return dict(outdir=str(tmp_path), alpha=alpha or {"start": 0.0, "stop": 0.02, "num": 2},
+                mu=mu or [0.01], tasks=tasks, fe={"configs": [["classic", "critical", 0.5]]})
+
+def dead_pid():
+    p = subprocess.Popen([sys.executable, "-c", "pass"])
+    p.wait()
+    return p.pid
+
+def write_outputs(job):
+    for p in job["outputs"]:
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        if p.endswith(".png"):
+            open(p, "wb").write(b"png")
+        elif job["task"] == "trace":
+            open(p, "w").write(f"sigma,t,abs_zeta_a_min\n{0.5 + job['alpha']},14.1,0.0\n0.5,21.0,0.0\n")
+        elif job["task"] == "fe":
+            open(p, "w").write("t,sigma,abs_ratio,arg_ratio\n10,0.5,1.0,0.1\n11,0.5,1.1,0.2\n")
+        else:
+            open(p, "w").write(f"alpha,mu,ks\n{job['alpha']},{job['mu']},0.1\n")
+    ss.write_stamp(job)
+
+def test_expand_spec_grid_and_names(tmp_path):
+    jobs = expand_spec(make_spec(tmp_path, ["trace", "ks", "fe"]))
+    ids = {j["id"] for j in jobs}
+    assert "trace_a0.02_m0.01" in ids and "ks_a0_m0.01" in ids
+    assert "fe_a0_m0.01_zeta_a_classic_critical_s0.5" in ids
+    assert len(jobs) == 6
+    ks = next(j for j in jobs if j["id"] == "ks_a0_m0.01")
+    assert ks["deps"] == ["trace_a0_m0.01"]
+
+def test_expand_spec_fe_sigma_and_duplicates(tmp_path):
+    spec = make_spec(tmp_path, ["fe"], alpha=[0.0])
+    spec["fe"]["configs"] = [["classic", "critical", 0.5], ["classic", "critical", 0.6]]
+    assert len({j["id"] for j in expand_spec(spec)}) == 2
+    spec["alpha"] = [0.0, 0.0]
+    with pytest.raises(ValueError, match="duplicate"):
+        expand_spec(spec)
+
+def test_job_command_matches_clis(tmp_path):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(ss.ROOT), str(ss.ROOT / "src")]))
+    for job in expand_spec(make_spec(tmp_path, ["heatmap", "trace", "fe"], alpha=[0.0])):
+        cmd = job_command(job)
+        assert job["outputs"][0] in cmd
+        usage = subprocess.run([cmd[0], cmd[1], "--help"], capture_output=True, text=True,
+                               env=env, check=True).stdout
+        assert all(f in usage for f in cmd if f.startswith("--"))
+    heat, trace, fe = expand_spec(make_spec(tmp_path, ["heatmap", "trace", "fe"], alpha=[0.0]))
+    assert "--out" in job_command(heat) and "--trace" in job_command(trace)
+    fe_cmd = job_command(fe)
+    assert fe_cmd[fe_cmd.index("--out_png") + 1] == fe["outputs"][1]
+
+def test_run_job_tolerates_missing_fe_png(tmp_path, monkeypatch):
+    fe = expand_spec(make_spec(tmp_path, ["fe"], alpha=[0.0]))[0]
+    monkeypatch.setattr(ss.subprocess, "run", lambda *a, **k: open(fe["outputs"][0], "w").write("t\n"))
+    run_job(fe, [])
+    assert is_complete(fe)
+    q = JobQueue(tmp_path)
+    assert q.enqueue([fe]) == {"done": 1}
+    trace = expand_spec(make_spec(tmp_path, ["trace"], alpha=[0.0]))[0]
+    with pytest.raises(RuntimeError, match="outputs are missing"):
+        run_job(trace, [])
+
+def test_queue_retries_and_blocks_dependents(tmp_path):
+    q = JobQueue(tmp_path)
+    q.enqueue(expand_spec(make_spec(tmp_path, ["ks"]))[:2], retries=1)
+    job, finished = q.claim("w1")
+    assert job["id"] == "trace_a0_m0.01" and not finished
+    # ks job waits on the running trace job
+    assert q.claim("w2") == (None, False)
+    q.finish(job["id"], "w1", error="boom")
+    job, _ = q.claim("w1")
+    assert job["id"] == "trace_a0_m0.01" and job["attempts"] == 2
+    q.finish(job["id"], "w1", error="boom")
+    assert q.claim("w1") == (None, True)
+    jobs = q.read()["jobs"]
+    assert jobs["trace_a0_m0.01"]["status"] == "failed"
+    assert jobs["ks_a0_m0.01"]["status"] == "blocked"
+
+def test_queue_skips_existing_outputs_and_requeues_expired(tmp_path):
+    jobs = expand_spec(make_spec(tmp_path, ["trace"]))
+    write_outputs(jobs[0])
+    q = JobQueue(tmp_path)
+    assert q.enqueue(jobs, retries=1, lease=-1) == {"done": 1, "pending": 1}
+    job, _ = q.claim("w1")
+    assert job["id"] == "trace_a0.02_m0.01"
+    # negative lease: the running job counts as abandoned and is handed out again
+    job, _ = q.claim("w2")
+    assert job["id"] == "trace_a0.02_m0.01" and job["worker"] == "w2"
+
+def test_changed_parameters_or_missing_outputs_rerun(tmp_path):
+    spec = make_spec(tmp_path, ["ks"], alpha=[0.0])
+    jobs = expand_spec(spec)
+    for job in jobs:
+        write_outputs(job)
+    q = JobQueue(tmp_path)
+    assert q.enqueue(jobs) == {"done": 2}
+    # a new k0 or trace option invalidates the trace and, through it, the KS job
+    for change in ({"k0": 0.5}, {"trace": {"tstart": 20}}):
+        assert q.enqueue(expand_spec(dict(spec, **change))) == {"pending": 2}
+    # back to the original parameters: stamps match again
+    assert q.enqueue(jobs) == {"done": 2}
+    os.remove(jobs[0]["outputs"][0])
+    assert q.enqueue(jobs) == {"done": 1, "pending": 1}
+    # outputs without a stamp (e.g. from an older run) are not trusted
+    write_outputs(jobs[0])
+    os.remove(ss.stamp_path(jobs[0]))
+    assert q.enqueue(jobs) == {"done": 1, "pending": 1}
+
+def test_enqueue_drops_old_jobs_and_refuses_changed_running(tmp_path):
+    q = JobQueue(tmp_path)
+    q.enqueue(expand_spec(make_spec(tmp_path, ["trace"], alpha=[0.0, 0.02, 0.04])))
+    job, _ = q.claim("w1")
+    assert q.enqueue(expand_spec(make_spec(tmp_path, ["trace"]))) == {"running": 1, "pending": 1, "dropped": 1}
+    with pytest.raises(RuntimeError, match="different parameters"):
+        q.enqueue(expand_spec(dict(make_spec(tmp_path, ["trace"]), k0=0.5)))
+
+def test_lease_is_stored_in_queue(tmp_path):
+    q = JobQueue(tmp_path)
+    jobs = expand_spec(make_spec(tmp_path, ["trace"], alpha=[0.0]))
+    q.enqueue(jobs, lease=3000)
+    assert q.read()["lease"] == 3000
+    q.claim("w1")
+    assert q.claim("w2") == (None, False)  # w1 is within the stored lease
+    q.enqueue(jobs, lease=-1)
+    assert q.claim("w2")[0]["worker"] == "w2"
+
+def test_restart_recovers_job_of_dead_worker(tmp_path):
+    jobs = expand_spec(make_spec(tmp_path, ["trace"], alpha=[0.0]))
+    q = JobQueue(tmp_path)
+    q.enqueue(jobs)
+    job, _ = q.claim(f"{socket.gethostname()}:{dead_pid()}")
+    assert q.enqueue(jobs) == {"pending": 1}
+    job2, _ = q.claim("w2")
+    assert job2["id"] == job["id"] and job2["attempts"] == 1
+
+def test_finish_requires_ownership(tmp_path):
+    q = JobQueue(tmp_path)
+    q.enqueue(expand_spec(make_spec(tmp_path, ["trace"], alpha=[0.0])), retries=1, lease=-1)
+    job, _ = q.claim("w1")
+    q.claim("w2")  # w1's lease has expired, w2 takes over
+    assert not q.finish(job["id"], "w1")
+    assert not q.heartbeat(job["id"], "w1")
+    rec = q.read()["jobs"][job["id"]]
+    assert rec["status"] == "running" and rec["worker"] == "w2"
+    assert q.finish(job["id"], "w2", error="interrupted", requeue=True)
+    rec = q.read()["jobs"][job["id"]]
+    assert rec["status"] == "pending" and rec["attempts"] == 1
+    job, _ = q.claim("w3")
+    q.claim("w4")  # second lost lease uses up the last retry
+    assert q.read()["jobs"][job["id"]]["status"] == "failed"
+
+def test_read_does_not_create_queue(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        JobQueue(tmp_path / "typo").read()
+    assert not (tmp_path / "typo").exists()
+
+def test_aggregate_steps_are_independent(tmp_path):
+    # outdir follows the a002_m001 run-directory convention; points must come from file names
+    outdir = tmp_path / "a002_m001"
+    jobs = expand_spec(make_spec(outdir, ["ks", "fe"]))
+    for job in jobs:
+        write_outputs(job)
+    JobQueue(outdir).enqueue(jobs)
+    assert aggregate(outdir) == []
+    assert not (outdir / "f_summary.csv").exists()  # 2 points (collinear): fit skipped
+    assert len(pd.read_csv(outdir / "fe_summary.csv")) == 2
+    assert len(pd.read_csv(outdir / "ks_summary.csv")) == 2
+
+    jobs = expand_spec(make_spec(outdir, ["ks", "fe"], mu=[0.01, 0.02]))
+    for job in jobs:
+        write_outputs(job)
+    JobQueue(outdir).enqueue(jobs)
+    for f in (outdir / "ks").glob("ks_*.csv"):
+        f.unlink()
+    assert aggregate(outdir) == ["summarize_ks"]
+    fit = pd.read_csv(outdir / "f_summary.csv")
+    assert sorted(zip(fit.alpha, fit.mu)) == [(0.0, 0.01), (0.0, 0.02), (0.02, 0.01), (0.02, 0.02)]
+    assert len(pd.read_csv(outdir / "fe_summary.csv")) == 4
+
+    # a smaller grid in the same outdir: leftover outputs from the old grid are ignored
+    jobs = expand_spec(make_spec(outdir, ["ks", "fe"], alpha=[0.0]))
+    # its ks CSV was deleted above, so that job is pending again and KS is not aggregated
+    assert JobQueue(outdir).enqueue(jobs) == {"done": 2, "pending": 1, "dropped": 9}
+    assert aggregate(outdir) == []
+    assert len(pd.read_csv(outdir / "fe_summary.csv")) == 1
+
+def test_manifold_fit_reads_negative_points(tmp_path):
+    from src.experiments.adaptive_manifold_fit import load_grid
+    files = []
+    for a, m in (("-0.01", "0.02"), ("0", "-0.5")):
+        fn = tmp_path / f"zeros_a{a}_m{m}.csv"
+        fn.write_text("sigma,t\n0.5,14.1\n")
+        files.append(str(fn))
+    grid = load_grid("unused", files=files)
+    assert sorted(zip(grid.alpha, grid.mu)) == [(-0.01, 0.02), (0.0, -0.5)]